@@ -13,18 +13,20 @@ comprehensive SEO analysis and actionable insights.
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import plotly.graph_objects as go
-import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
 
 from utilities.compare_pages import (
     fetch_html_content,
     compare_articles,
     get_top_competitor,
 )
-from utilities.lightHTMLsum import generate_ai_report
-from utilities.lighthouse import get_lighthouse
+from utilities.lightHTMLsum import compact_text, stream_ai_report
+from utilities.lighthouse import get_lighthouse, summarize_lighthouse
 
 
 # Constants
@@ -37,6 +39,14 @@ TAB_LIGHTHOUSE = "📊 Lighthouse Results"
 TAB_CONTENT = "📝 Content Analysis"
 TAB_COMPETITOR = "🔄 Competitor Analysis"
 
+# Lighthouse metrics and their PageSpeed Insights category ids
+LIGHTHOUSE_METRICS = (
+    ('Performance', 'performance'),
+    ('Accessibility', 'accessibility'),
+    ('Best Practices', 'best-practices'),
+    ('SEO', 'seo'),
+)
+
 # CSS styles
 CUSTOM_CSS = """
     <style>
@@ -84,57 +94,97 @@ def extract_homepage_url(article_url: str) -> str:
     if not article_url:
         raise ValueError("Article URL cannot be empty")
         
-    parts = article_url.split('/')
-    if '//' in article_url:
-        return f"{parts[0]}//{parts[2]}"
-    return parts[0]
+    parts = urlsplit(article_url)
+    if parts.netloc:
+        return f"{parts.scheme}://{parts.netloc}"
+    return parts.path.split('/')[0]
 
-def extract_metrics(text: str) -> Dict[str, float]:
+def extract_metrics(report: dict) -> Dict[str, float]:
     """
-    Extract Lighthouse performance metrics from the analysis text.
+    Extract Lighthouse category scores from a PageSpeed Insights response.
     
     Args:
-        text (str): Raw Lighthouse analysis text containing performance scores
+        report (dict): PageSpeed Insights response containing Lighthouse categories
         
     Returns:
         Dict[str, float]: Dictionary containing performance metrics
             
     Note:
-        All scores are converted from percentage (0-100) to decimal (0.0-1.0)
+        Scores are already reported as decimals (0.0-1.0) by the API
     """
-    if not text:
-        st.error("Analysis text is empty")
+    if not report:
+        st.error("Lighthouse report is empty")
         return {}
         
-    metrics: Dict[str, float] = {}
-    
-    # Patterns for metrics
-    patterns = {
-        'Performance': r'(\d+)\nPerformance',
-        'Accessibility': r'(\d+)\nAccessibility',
-        'Best Practices': r'(\d+)\nBest Practices',
-        'SEO': r'(\d+)\nSEO'
-    }
+    # Default value if metric not found
+    metrics: Dict[str, float] = {metric: 0.0 for metric, _ in LIGHTHOUSE_METRICS}
     
     try:
-        for metric, pattern in patterns.items():
-            match = re.search(pattern, text)
-            if match:
-                score = int(match.group(1))
-                metrics[metric] = score / 100
-            else:
-                metrics[metric] = 0.0  # Default value if metric not found
+        categories = report["lighthouseResult"]["categories"]
+        for metric, category_id in LIGHTHOUSE_METRICS:
+            score = categories.get(category_id, {}).get("score")
+            if score is not None:
+                metrics[metric] = float(score)
         
         return metrics
         
     except Exception as e:
         st.error(f"Error extracting metrics: {str(e)}")
-        return {
-            'Performance': 0.0,
-            'Accessibility': 0.0,
-            'Best Practices': 0.0,
-            'SEO': 0.0
-        }
+        return {metric: 0.0 for metric, _ in LIGHTHOUSE_METRICS}
+
+@st.cache_data(show_spinner=False)
+def build_radar_chart(
+    metrics: Tuple[str, ...],
+    mobile_values: Tuple[float, ...],
+    desktop_values: Tuple[float, ...]
+) -> go.Figure:
+    """
+    Build the mobile vs desktop radar chart for the Lighthouse metrics.
+    
+    Args:
+        metrics (Tuple[str, ...]): Metric names used as the chart axes
+        mobile_values (Tuple[float, ...]): Mobile scores (0-100) in metric order
+        desktop_values (Tuple[float, ...]): Desktop scores (0-100) in metric order
+        
+    Returns:
+        go.Figure: Plotly radar chart comparing both form factors
+        
+    Note:
+        Cached on the (hashable) metric tuples so reruns reuse the figure
+    """
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=list(mobile_values),
+        theta=list(metrics),
+        fill='toself',
+        name='Mobile',
+        line=dict(color='#FF1E1E', width=2),
+        fillcolor='rgba(255, 30, 30, 0.4)'
+    ))
+    fig.add_trace(go.Scatterpolar(
+        r=list(desktop_values),
+        theta=list(metrics),
+        fill='toself',
+        name='Desktop',
+        line=dict(color='#00B4D8', width=2),
+        fillcolor='rgba(0, 180, 216, 0.4)'
+    ))
+    
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 100]
+            ),
+            bgcolor='rgba(255, 255, 255, 0.9)'
+        ),
+        showlegend=True,
+        title="Mobile vs Desktop Performance Comparison",
+        paper_bgcolor='rgba(255, 255, 255, 0)',
+        plot_bgcolor='rgba(255, 255, 255, 0)'
+    )
+    
+    return fig
 
 # Header
 st.title("🚀 SEO Performance Analysis Tool")
@@ -152,17 +202,32 @@ if st.button("Start Analysis", type="primary"):
     if article_url and keyword:
         with st.spinner("Analysis in progress... This may take a few minutes."):
             try:
-                # Get competitor URL
                 article_url = article_url.strip()
-                competitor_url = get_top_competitor(keyword, article_url.split('/')[2])
+                url_parts = urlsplit(article_url)
+                if not url_parts.netloc:
+                    raise ValueError("Article URL must start with http:// or https://")
+                homepage_url = extract_homepage_url(article_url)
+                
+                # Start the independent network calls concurrently. Workers get the
+                # script run context, without it st.cache_data neither reads nor writes
+                with ThreadPoolExecutor(
+                    max_workers=3,
+                    initializer=add_script_run_ctx,
+                    initargs=(None, get_script_run_ctx())
+                ) as executor:
+                    competitor_future = executor.submit(get_top_competitor, keyword, url_parts.netloc)
+                    lighthouse_future = executor.submit(get_lighthouse, homepage_url)
+                    html_future = executor.submit(fetch_html_content, article_url)
+                
+                # Get competitor URL
+                competitor_url = competitor_future.result()
                 
                 # Create tabs for different sections using constants
                 tab1, tab2, tab3 = st.tabs([TAB_LIGHTHOUSE, TAB_CONTENT, TAB_COMPETITOR])
-                homepage_url = extract_homepage_url(article_url)
                 
                 with tab1:
                     st.subheader("Lighthouse Performance Metrics")
-                    mobile_report, desktop_report = get_lighthouse(homepage_url)
+                    mobile_report, desktop_report = lighthouse_future.result()
                     
                     if mobile_report and desktop_report:
                         # Parse metrics for display
@@ -176,7 +241,7 @@ if st.button("Start Analysis", type="primary"):
                             for metric, value in mobile_data.items():
                                 st.metric(
                                     label=metric,
-                                    value=f"{int(value * 100)}%"
+                                    value=f"{round(value * 100)}%"
                                 )
                         
                         with col2:
@@ -184,97 +249,52 @@ if st.button("Start Analysis", type="primary"):
                             for metric, value in desktop_data.items():
                                 st.metric(
                                     label=metric,
-                                    value=f"{int(value * 100)}%"
+                                    value=f"{round(value * 100)}%"
                                 )
                             
                         # Prepare metrics for radar chart
-                        metrics = list(mobile_data.keys())
-                        mobile_values = [mobile_data[m] * 100 for m in metrics]
-                        desktop_values = [desktop_data[m] * 100 for m in metrics]
-                        
-                        fig = go.Figure()
-                        fig.add_trace(go.Scatterpolar(
-                            r=mobile_values,
-                            theta=metrics,
-                            fill='toself',
-                            name='Mobile',
-                            line=dict(color='#FF1E1E', width=2),
-                            fillcolor='rgba(255, 30, 30, 0.4)'
-                        ))
-                        fig.add_trace(go.Scatterpolar(
-                            r=desktop_values,
-                            theta=metrics,
-                            fill='toself',
-                            name='Desktop',
-                            line=dict(color='#00B4D8', width=2),
-                            fillcolor='rgba(0, 180, 216, 0.4)'
-                        ))
-                        
-                        fig.update_layout(
-                            polar=dict(
-                                radialaxis=dict(
-                                    visible=True,
-                                    range=[0, 100]
-                                ),
-                                bgcolor='rgba(255, 255, 255, 0.9)'
-                            ),
-                            showlegend=True,
-                            title="Mobile vs Desktop Performance Comparison",
-                            paper_bgcolor='rgba(255, 255, 255, 0)',
-                            plot_bgcolor='rgba(255, 255, 255, 0)'
-                        )
+                        metrics = tuple(mobile_data.keys())
+                        mobile_values = tuple(mobile_data[m] * 100 for m in metrics)
+                        desktop_values = tuple(desktop_data[m] * 100 for m in metrics)
                         
+                        fig = build_radar_chart(metrics, mobile_values, desktop_values)
                         st.plotly_chart(fig, use_container_width=True)
                 
                 with tab2:
                     st.subheader("Page Content Analysis")
-                    _, html_content = fetch_html_content(article_url)
+                    _, html_content, html_raw = html_future.result()
                     if html_content:
-                        # Use original texts for AI report
+                        # Use report summaries for AI report
                         combined_data = {
-                            'lighthouse_data': f"MOBILE REPORT:\n{mobile_report[:3000]}\n\nDESKTOP REPORT:\n{desktop_report[:3000]}",
+                            'lighthouse_data': f"MOBILE REPORT:\n{compact_text(summarize_lighthouse(mobile_report), 500)}\n\nDESKTOP REPORT:\n{compact_text(summarize_lighthouse(desktop_report), 500)}",
                             'html_content': html_content,
                             'website_url': homepage_url,
                             'article_url': article_url
                         }
-                        ai_report = generate_ai_report(combined_data)
-                        st.markdown(ai_report)
+                        # Render the report as it streams in, keep the full text for export
+                        ai_report = st.write_stream(stream_ai_report(combined_data))
                 
                 with tab3:
                     st.subheader("Competitor Analysis")
                     if competitor_url:
                         st.markdown(f"**🎯 Top Ranking Competitor URL:** {competitor_url}")
-                        comparison_result = compare_articles(article_url, competitor_url, keyword)
+                        comparison_result = compare_articles(
+                            article_url, competitor_url, keyword, our_html_raw=html_raw
+                        )
                         st.markdown("### 📊 Comparison Results")
                         st.markdown(comparison_result)
                     else:
                         st.warning("No competitor URL found.")
                 
-                # Export results
-                results_data = {
-                    'Basic Information': {
-                        'Article URL': article_url,
-                        'Keyword': keyword,
-                        'Competitor URL': competitor_url
-                    },
-                    'Mobile Metrics': mobile_data,
-                    'Desktop Metrics': desktop_data
-                }
-                
-                # Flatten the nested dictionary for CSV
+                # Export results, flattened for CSV
                 flattened_data = {
-                    'Article URL': results_data['Basic Information']['Article URL'],
-                    'Keyword': results_data['Basic Information']['Keyword'],
-                    'Competitor URL': results_data['Basic Information']['Competitor URL'],
-                    'Mobile Performance': f"{int(results_data['Mobile Metrics'].get('Performance', 0) * 100)}%",
-                    'Mobile Accessibility': f"{int(results_data['Mobile Metrics'].get('Accessibility', 0) * 100)}%",
-                    'Mobile Best Practices': f"{int(results_data['Mobile Metrics'].get('Best Practices', 0) * 100)}%",
-                    'Mobile SEO': f"{int(results_data['Mobile Metrics'].get('SEO', 0) * 100)}%",
-                    'Desktop Performance': f"{int(results_data['Desktop Metrics'].get('Performance', 0) * 100)}%",
-                    'Desktop Accessibility': f"{int(results_data['Desktop Metrics'].get('Accessibility', 0) * 100)}%",
-                    'Desktop Best Practices': f"{int(results_data['Desktop Metrics'].get('Best Practices', 0) * 100)}%",
-                    'Desktop SEO': f"{int(results_data['Desktop Metrics'].get('SEO', 0) * 100)}%"
+                    'Article URL': article_url,
+                    'Keyword': keyword,
+                    'Competitor URL': competitor_url
                 }
+                for device, device_data in (('Mobile', mobile_data), ('Desktop', desktop_data)):
+                    for metric, _ in LIGHTHOUSE_METRICS:
+                        flattened_data[f"{device} {metric}"] = f"{round(device_data.get(metric, 0) * 100)}%"
                 
                 # Create DataFrame
                 results_df = pd.DataFrame([flattened_data])
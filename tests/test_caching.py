@@ -0,0 +1,158 @@
+"""
+Checks for page parsing, competitor lookup and reusing cached network results.
+"""
+
+import os
+from unittest import mock
+
+os.environ.setdefault("GEMINI_API_KEY", "test-gemini-key")
+os.environ.setdefault("BRIGHTDATA_API_KEY", "test-brightdata-key")
+
+import requests
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from utilities import compare_pages, lightHTMLsum, lighthouse
+
+ARTICLE_URL = "https://example.com/article"
+COMPETITOR_URL = "https://competitor.com/article"
+
+SERP_HTML = f'<div class="g"><a href="{COMPETITOR_URL}">Competitor</a></div>'
+PAGE_HTML = "<article class='content'><h1>Title</h1><p>Body text</p></article>"
+PSI_REPORT = {
+    "lighthouseResult": {
+        "categories": {
+            "performance": {"title": "Performance", "score": 0.29},
+            "accessibility": {"title": "Accessibility", "score": 0.9},
+            "best-practices": {"title": "Best Practices", "score": 1.0},
+            "seo": {"title": "SEO", "score": 0.57},
+        },
+        "audits": {},
+    }
+}
+
+
+def _response(status_code=200, text="", json_data=None):
+    response = mock.Mock(status_code=status_code, text=text)
+    response.json.return_value = json_data
+    if status_code != 200:
+        response.raise_for_status.side_effect = requests.HTTPError(str(status_code))
+    return response
+
+
+def _brightdata_post(url, json, timeout):
+    if json["zone"] == "serp_api1":
+        return _response(text=SERP_HTML)
+    return _response(text=PAGE_HTML)
+
+
+def _fake_model():
+    model = mock.Mock()
+    model.generate_content.side_effect = lambda prompt, stream=False: (
+        [mock.Mock(text="Report")] if stream else mock.Mock(text="Comparison")
+    )
+    return model
+
+
+def _run_analysis(app):
+    app.text_input[0].input(ARTICLE_URL)
+    app.text_input[1].input("keyword")
+    app.button[0].click().run(timeout=30)
+    assert not app.exception
+    assert not app.error
+
+
+def _calls(post, zone, url=None):
+    return [
+        call for call in post.call_args_list
+        if call.kwargs["json"]["zone"] == zone
+        and (url is None or call.kwargs["json"]["url"] == url)
+    ]
+
+
+def test_repeat_analysis_uses_cache():
+    st.cache_data.clear()
+    model = _fake_model()
+
+    with mock.patch.object(compare_pages.session, "post", side_effect=_brightdata_post) as post, \
+         mock.patch.object(lighthouse.session, "get", return_value=_response(json_data=PSI_REPORT)) as get, \
+         mock.patch.object(compare_pages, "_get_model", return_value=model), \
+         mock.patch.object(lightHTMLsum, "_get_model", return_value=model):
+        app = AppTest.from_file("../app.py", default_timeout=30)
+        app.run()
+
+        _run_analysis(app)
+        assert get.call_count == 2
+        assert len(_calls(post, "serp_api1")) == 1
+        assert len(_calls(post, "web_unlocker1", COMPETITOR_URL)) == 1
+
+        _run_analysis(app)
+        assert get.call_count == 2
+        assert len(_calls(post, "serp_api1")) == 1
+        assert len(_calls(post, "web_unlocker1", COMPETITOR_URL)) == 1
+
+
+def _fetch_script():
+    import streamlit as st
+    from utilities.compare_pages import fetch_page_content, get_top_competitor
+
+    st.text(repr(get_top_competitor("keyword", "example.com")))
+    st.text(repr(fetch_page_content("https://competitor.com/article")))
+
+
+def test_failed_fetch_is_not_cached():
+    st.cache_data.clear()
+    app = AppTest.from_function(_fetch_script, default_timeout=30)
+
+    with mock.patch.object(compare_pages.session, "post", return_value=_response(503)):
+        app.run()
+        assert [text.value for text in app.text] == ["None", "None"]
+
+    with mock.patch.object(compare_pages.session, "post", side_effect=_brightdata_post) as post:
+        app.run()
+        assert [text.value for text in app.text] == [repr(COMPETITOR_URL), repr("TitleBody text")]
+        assert post.call_count == 2
+
+
+def test_competitor_uses_first_link_of_each_result():
+    st.cache_data.clear()
+    serp_html = (
+        '<div class="g"><a href="/url?q=https://first.com/">First</a>'
+        '<a href="https://translate.google.com/translate?u=https://first.com/">Translate</a></div>'
+        '<div class="g"><a href="https://second.com/">Second</a></div>'
+    )
+
+    with mock.patch.object(compare_pages.session, "post", return_value=_response(text=serp_html)):
+        assert compare_pages.get_top_competitor("keyword", "example.com") == "https://second.com/"
+
+
+def test_competitor_matches_multi_class_results():
+    st.cache_data.clear()
+    serp_html = (
+        '<div class="g Ww4FFb tF2Cxc"><a href="https://first.com/x">First</a></div>'
+        '<div class="g"><a href="https://second.com/">Second</a></div>'
+    )
+
+    with mock.patch.object(compare_pages.session, "post", return_value=_response(text=serp_html)):
+        assert compare_pages.get_top_competitor("keyword", "example.com") == "https://first.com/x"
+
+
+def test_report_prompt_keeps_escaped_markup_as_text():
+    page_html = (
+        "<h1>Using the &lt;p&gt; tag</h1>"
+        "<p>Write &lt;script src=x&gt; in your head, 5 &lt; 6</p>"
+        "<p>Next para</p>"
+    )
+
+    with mock.patch.object(compare_pages.session, "post", return_value=_response(text=page_html)):
+        _, html_content, _ = compare_pages.fetch_html_content(ARTICLE_URL)
+
+    assert html_content.splitlines() == [
+        "h1: Using the <p> tag",
+        "p: Write <script src=x> in your head, 5 < 6",
+        "p: Next para",
+    ]
+    prompt = lightHTMLsum._build_report_prompt({"lighthouse_data": "", "html_content": html_content})
+    assert "h1: Using the <p> tag" in prompt
+    assert "p: Write <script src=x> in your head, 5 < 6" in prompt
+    assert "p: Next para" in prompt
@@ -7,14 +7,17 @@ Provides functionality to:
 - Generate detailed comparison reports
 """
 
-import json
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import functools
 import os
-import google.generativeai as genai
-import urllib.request
+from typing import Optional
 from dotenv import load_dotenv
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Load environment variables
 load_dotenv()
@@ -23,8 +26,30 @@ load_dotenv()
 def get_api_key(key_name):
     return os.getenv(key_name) or st.secrets[key_name]
 
-# Gemini API configuration
-genai.configure(api_key=get_api_key("GEMINI_API_KEY"))
+# API keys, read once at import
+GEMINI_API_KEY = get_api_key("GEMINI_API_KEY")
+BRIGHTDATA_API_KEY = get_api_key("BRIGHTDATA_API_KEY")
+
+# Brightdata API session, reused across requests for connection pooling
+BRIGHTDATA_API_URL = "https://api.brightdata.com/request"
+REQUEST_TIMEOUT = 60
+session = requests.Session()
+session.headers.update({
+    "Content-Type": "application/json",
+    "Authorization": f"Bearer {BRIGHTDATA_API_KEY}"
+})
+session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    # Retry only failed connections: a POST that reached Brightdata may be billed
+    max_retries=Retry(total=3, connect=3, read=0, status=0, other=0, backoff_factor=0.5)
+))
+
+# Parse only the tags each function reads
+CONTENT_TAGS = SoupStrainer(['h1', 'h2', 'h3', 'p'])
+PAGE_TAGS = SoupStrainer(['main', 'article', 'div', 'h1', 'h2', 'h3', 'p'])
+# Match "g" within the class list: organic results look like class="g Ww4FFb tF2Cxc"
+SEARCH_RESULTS = SoupStrainer("div", class_=lambda classes: classes and "g" in classes.split())
 
 # Gemini model configuration
 generation_config = {
@@ -34,10 +59,53 @@ generation_config = {
     "max_output_tokens": 8192,
 }
 
-model = genai.GenerativeModel(
-    model_name="gemini-1.5-flash-8b",
-    generation_config=generation_config,
-)
+@functools.lru_cache(maxsize=None)
+def _get_model():
+    """
+    Configure the Gemini SDK and create the model on first use.
+    
+    Returns:
+        genai.GenerativeModel: Shared Gemini model instance
+        
+    Note:
+        Importing the SDK is deferred so loading the app does not pay for it
+    """
+    import google.generativeai as genai
+    
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai.GenerativeModel(
+        model_name="gemini-1.5-flash-8b",
+        generation_config=generation_config,
+    )
+
+def fetch_raw_html(url: str) -> str:
+    """
+    Fetch the raw HTML of a page through the Brightdata Web Unlocker.
+    
+    Args:
+        url (str): The target URL to fetch
+        
+    Returns:
+        str: Raw HTML of the page
+        
+    Raises:
+        requests.HTTPError: If the API does not return a 200 response
+    """
+    payload = {
+        "zone": "web_unlocker1",
+        "url": url,
+        "format": "raw"
+    }
+    
+    # Make request to Brightdata API
+    response = session.post(BRIGHTDATA_API_URL, json=payload, timeout=REQUEST_TIMEOUT)
+    
+    if response.status_code != 200:
+        raise requests.HTTPError(
+            f"Error from Brightdata API: {response.status_code}", response=response
+        )
+    
+    return response.text
 
 def fetch_html_content(url: str) -> tuple:
     """
@@ -47,9 +115,10 @@ def fetch_html_content(url: str) -> tuple:
         url (str): The target URL to fetch content from
         
     Returns:
-        tuple: (url, html_content)
+        tuple: (url, html_content, html_raw)
             - url (str): The processed URL
-            - html_content (str): Parsed HTML content or None if failed
+            - html_content (str): One "tag: text" line per heading or paragraph, or None if failed
+            - html_raw (str): Full page HTML, for reuse by compare_articles, or None if failed
             
     Note:
         Extracts main content tags (h1, h2, h3, p) for analysis
@@ -59,36 +128,69 @@ def fetch_html_content(url: str) -> tuple:
         url = 'https://' + url
 
     try:
-        # Brightdata API configuration
-        api_url = "https://api.brightdata.com/request"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {get_api_key('BRIGHTDATA_API_KEY')}"
-        }
-        payload = {
-            "zone": "web_unlocker1",
-            "url": url,
-            "format": "raw"
-        }
+        html_raw = fetch_raw_html(url)
         
-        # Make request to Brightdata API
-        response = requests.post(api_url, json=payload, headers=headers)
+        if html_raw:
+            soup = BeautifulSoup(html_raw, 'lxml', parse_only=CONTENT_TAGS)
+            lines = []
+            for tag in soup.find_all(['h1', 'h2', 'h3', 'p']):
+                text = ' '.join(tag.get_text(' ').split())
+                if text:
+                    lines.append(f"{tag.name}: {text}")
+            return url, '\n'.join(lines), html_raw
         
-        if response.status_code == 200:
-            html_content = response.text
-            soup = BeautifulSoup(html_content, 'html.parser')
-            tags = soup.find_all(['h1', 'h2', 'h3', 'p'])
-            collected_html = ''.join(str(tag) for tag in tags)
-            return url, collected_html
-        else:
-            print(f"Error from Brightdata API: {response.status_code}")
-            return url, None
+        return url, None, None
 
     except Exception as e:
         print(f"Error fetching HTML content from {url}: {e}")
-        return url, None
+        return url, None, None
+
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def _search_top_competitor(keyword: str, our_domain: str) -> Optional[str]:
+    """
+    Query the Brightdata SERP API and pick the top result outside our domain.
+    
+    Args:
+        keyword (str): The target keyword to search for
+        our_domain (str): Our website's domain to exclude from results
+        
+    Returns:
+        str: URL of the top-ranking competitor, or None if no result qualifies
+        
+    Raises:
+        requests.RequestException: If the SERP request fails, so failures are not cached
+    """
+    # URL encode the keyword
+    encoded_keyword = requests.utils.quote(keyword)
+    
+    payload = {
+        "zone": "serp_api1",
+        "url": f"https://www.google.com/search?q={encoded_keyword}",
+        "format": "raw"
+    }
 
+    response = session.post(BRIGHTDATA_API_URL, json=payload, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    
+    # Parse HTML with BeautifulSoup
+    soup = BeautifulSoup(response.text, 'lxml', parse_only=SEARCH_RESULTS)
+    
+    # Return the first valid result URL that's not our domain
+    for result in soup.find_all("div", {"class": "g"}):
+        link_element = result.find('a')
+        link = link_element.get('href') if link_element else None
+        
+        # Validate link format, skipping ad (aclk) links
+        if not (link and 
+                link.startswith(('http://', 'https://')) and 
+                'aclk' not in link):
+            continue
+            
+        if our_domain not in link:
+            return link
 
+    return None
 
 def get_top_competitor(keyword: str, our_domain: str) -> str:
     """
@@ -103,82 +205,27 @@ def get_top_competitor(keyword: str, our_domain: str) -> str:
         
     Note:
         Uses Brightdata SERP API to fetch real-time search results
+        Successful searches are cached for 30 minutes per keyword and domain
     """
     try:
-        url = "https://api.brightdata.com/request"
-        
-        # URL encode the keyword
-        encoded_keyword = requests.utils.quote(keyword)
-        
-        payload = {
-            "zone": "serp_api1",
-            "url": f"https://www.google.com/search?q={encoded_keyword}",
-            "format": "raw"
-        }
-        
-        headers = {
-            "Authorization": f"Bearer {get_api_key('BRIGHTDATA_API_KEY')}",
-            "Content-Type": "application/json"
-        }
-
-        response = requests.post(url, json=payload, headers=headers)
-        
-        if response.status_code == 200:
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find all search results
-            all_data = soup.find_all("div", {"class": "g"})
-            position = 0
-            search_results = []
-            
-            for result in all_data:
-                try:
-                    link_element = result.find('a')
-                    if not link_element:
-                        continue
-                        
-                    link = link_element.get('href')
-                    
-                    # Validate link format
-                    if (link and 
-                        link.find('https') != -1 and 
-                        link.find('http') == 0 and 
-                        link.find('aclk') == -1):
-                        
-                        position += 1
-                        result_data = {
-                            "link": link,
-                            "position": position
-                        }
-                        
-                        # Get title
-                        try:
-                            result_data["title"] = result.find('h3', {"class": "DKV0Md"}).text
-                        except:
-                            result_data["title"] = None
-                            
-                        # Get description    
-                        try:
-                            result_data["description"] = result.find("div", {"class": "VwiC3b"}).text
-                        except:
-                            result_data["description"] = None
-                            
-                        search_results.append(result_data)
-                except Exception as e:
-                    print(f"Error parsing result: {e}")
-                    continue
-            
-            # Return first result URL that's not our domain
-            for result in search_results:
-                if our_domain not in result["link"]:
-                    return result["link"]
-    
-        return None
+        return _search_top_competitor(keyword, our_domain)
     except Exception as e:
         print(f"Error in getting competitor: {e}")
         return None
 
+@st.cache_data(ttl=1800, show_spinner=False)
+def _fetch_page_text(url: str) -> str:
+    """
+    Fetch a page and extract its main content, raising on failure so errors are not cached.
+    
+    Args:
+        url (str): The target URL to fetch content from
+        
+    Returns:
+        str: Extracted main content text
+    """
+    return parse_page_content(fetch_raw_html(url))
+
 def fetch_page_content(url: str) -> str:
     """
     Fetch and parse webpage content focusing on main article content.
@@ -191,39 +238,41 @@ def fetch_page_content(url: str) -> str:
         
     Note:
         Prioritizes content within main, article, or content-specific div tags
+        Successful fetches are cached for 30 minutes per URL
     """
     try:
-        # Brightdata API configuration
-        api_url = "https://api.brightdata.com/request"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {get_api_key('BRIGHTDATA_API_KEY')}"
-        }
-        payload = {
-            "zone": "web_unlocker1",
-            "url": url,
-            "format": "raw"
-        }
-        
-        # Make request to Brightdata API
-        response = requests.post(api_url, json=payload, headers=headers)
-        
-        if response.status_code == 200:
-            html_content = response.text
-            soup = BeautifulSoup(html_content, 'html.parser')
-            main_content = soup.find_all(['main', 'article', 'div'], class_=['content', 'main', 'body'])
-            
-            if not main_content:
-                main_content = soup.find_all(['h1', 'h2', 'h3', 'p'])
-                
-            return ' '.join([tag.get_text(strip=True) for tag in main_content])
-        
-        return None
+        return _fetch_page_text(url)
     except Exception as e:
         print(f"Error fetching {url}: {e}")
         return None
 
-def compare_articles(our_url: str, competitor_url: str, main_keyword: str) -> str:
+def parse_page_content(html: str) -> str:
+    """
+    Extract main article text from raw page HTML.
+    
+    Args:
+        html (str): Raw HTML of the page
+        
+    Returns:
+        str: Extracted main content text
+        
+    Note:
+        Falls back to headings and paragraphs when no content container is found
+    """
+    soup = BeautifulSoup(html, 'lxml', parse_only=PAGE_TAGS)
+    main_content = soup.find_all(['main', 'article', 'div'], class_=['content', 'main', 'body'])
+    
+    if not main_content:
+        main_content = soup.find_all(['h1', 'h2', 'h3', 'p'])
+        
+    return ' '.join([tag.get_text(strip=True) for tag in main_content])
+
+def compare_articles(
+    our_url: str,
+    competitor_url: str,
+    main_keyword: str,
+    our_html_raw: Optional[str] = None
+) -> str:
     """
     Perform comprehensive SEO comparison between two articles.
     
@@ -231,6 +280,7 @@ def compare_articles(our_url: str, competitor_url: str, main_keyword: str) -> st
         our_url (str): URL of our article
         competitor_url (str): URL of competitor's article
         main_keyword (str): Primary keyword for comparison
+        our_html_raw (str, optional): Already fetched HTML of our article, skips refetching it
         
     Returns:
         str: Detailed SEO analysis report
@@ -239,14 +289,22 @@ def compare_articles(our_url: str, competitor_url: str, main_keyword: str) -> st
         Focuses on content structure, relevance, and optimization patterns
     """
     try:
-        # Extract domain from our URL
-        our_domain = our_url.split('/')[2] if '//' in our_url else our_url.split('/')[0]
-        
         if not competitor_url:
             return "Could not find competitor URL"
         
-        our_content = fetch_page_content(our_url)
-        competitor_content = fetch_page_content(competitor_url)
+        # Fetch the competitor page while our page is fetched or parsed
+        # Attach the script run context so cached calls work on the worker
+        with ThreadPoolExecutor(
+            max_workers=1,
+            initializer=add_script_run_ctx,
+            initargs=(None, get_script_run_ctx())
+        ) as executor:
+            competitor_future = executor.submit(fetch_page_content, competitor_url)
+            if our_html_raw:
+                our_content = parse_page_content(our_html_raw)
+            else:
+                our_content = fetch_page_content(our_url)
+            competitor_content = competitor_future.result()
         
         if not our_content or not competitor_content:
             return "Error fetching page content"
@@ -273,9 +331,8 @@ def compare_articles(our_url: str, competitor_url: str, main_keyword: str) -> st
         4. SEO optimization patterns
         5. Strategic recommendations"""
         
-        # Send message to Gemini
-        chat_session = model.start_chat(history=[])
-        response = chat_session.send_message(prompt)
+        # Single-shot request to Gemini
+        response = _get_model().generate_content(prompt)
         
         return response.text
         
@@ -3,8 +3,9 @@ Module for generating AI-powered SEO analysis reports using Google's Gemini AI.
 Processes Lighthouse metrics and HTML content to provide comprehensive SEO recommendations.
 """
 
+import functools
 import os
-import google.generativeai as genai
+from typing import Iterator
 from dotenv import load_dotenv
 import streamlit as st
 
@@ -24,9 +25,6 @@ def get_api_key() -> str:
     """
     return os.getenv("GEMINI_API_KEY") or st.secrets["GEMINI_API_KEY"]
 
-# Gemini API configuration
-genai.configure(api_key=get_api_key())
-
 # Model configuration
 generation_config = {
     "temperature": 1,
@@ -35,41 +33,57 @@ generation_config = {
     "max_output_tokens": 8192,
 }
 
-# Create model
-model = genai.GenerativeModel(
-    model_name="gemini-1.5-flash-8b",
-    generation_config=generation_config,
-)
+@functools.lru_cache(maxsize=None)
+def _get_model():
+    """
+    Configure the Gemini SDK and create the model on first use.
+    
+    Returns:
+        genai.GenerativeModel: Shared Gemini model instance
+        
+    Note:
+        Deferred until a report is requested, not run at import
+    """
+    import google.generativeai as genai
+    
+    genai.configure(api_key=get_api_key())
+    return genai.GenerativeModel(
+        model_name="gemini-1.5-flash-8b",
+        generation_config=generation_config,
+    )
 
-def generate_ai_report(data: dict) -> str:
+def compact_text(text: str, max_tokens: int = 800) -> str:
     """
-    Generate a comprehensive SEO analysis report using Gemini AI.
+    Collapse whitespace, drop blank lines and cap text to an approximate token budget.
     
     Args:
-        data (dict): Analysis data containing:
-            - lighthouse_data (str): Lighthouse performance metrics
-            - html_content (str): Webpage HTML content
-            - website_url (str): Main website URL
-            - article_url (str): Specific article URL
-            
+        text (str): Text to shorten before sending it to the model
+        max_tokens (int): Approximate token budget, at ~4 characters per token
+        
     Returns:
-        str: Detailed SEO analysis report 
-            
-    Note:
-        Uses Gemini AI to analyze both technical metrics and content structure
-        Provides actionable insights for SEO improvement
+        str: Whitespace-normalized text of at most max_tokens * 4 characters
+    """
+    if not text:
+        return ""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)[:max_tokens * 4]
+
+def _build_report_prompt(data: dict) -> str:
+    """
+    Build the SEO analysis prompt sent to Gemini.
+    
+    Args:
+        data (dict): Analysis data, see generate_ai_report
+        
+    Returns:
+        str: Prompt text with the Lighthouse summary and page content sample filled in
     """
     lighthouse_data = data["lighthouse_data"] if data["lighthouse_data"] else ""
-    html = data["html_content"][:3000] if data["html_content"] else ""
+    html = compact_text(data["html_content"])
     website_url = data.get("website_url", "")
     article_url = data.get("article_url", "")
     
-    # Start chat session
-    chat_session = model.start_chat(history=[])
-    
-    # Send prompt
-    response = chat_session.send_message(
-        f"""Based on these data, generate a comprehensive SEO analysis report:
+    return f"""Based on these data, generate a comprehensive SEO analysis report:
         
         Website URL: {website_url}
         Article URL: {article_url}
@@ -77,7 +91,7 @@ def generate_ai_report(data: dict) -> str:
         Lighthouse Summary:
         {lighthouse_data}
         
-        Homepage HTML Sample:
+        Page Content Sample (one heading or paragraph per line):
         {html}
         
         Please focus on:
@@ -87,6 +101,44 @@ def generate_ai_report(data: dict) -> str:
         4. SEO optimization opportunities
         5. Key areas for improvement
         """
-    )
+
+def generate_ai_report(data: dict) -> str:
+    """
+    Generate a comprehensive SEO analysis report using Gemini AI.
+    
+    Args:
+        data (dict): Analysis data containing:
+            - lighthouse_data (str): Lighthouse performance metrics
+            - html_content (str): Page headings and paragraphs as "tag: text" lines
+            - website_url (str): Main website URL
+            - article_url (str): Specific article URL
+            
+    Returns:
+        str: Detailed SEO analysis report 
+            
+    Note:
+        Uses Gemini AI to analyze both technical metrics and content structure
+        Provides actionable insights for SEO improvement
+    """
+    # Single-shot request to Gemini
+    response = _get_model().generate_content(_build_report_prompt(data))
+    
+    return response.text
+
+def stream_ai_report(data: dict) -> Iterator[str]:
+    """
+    Stream the SEO analysis report from Gemini AI as it is generated.
+    
+    Args:
+        data (dict): Analysis data, see generate_ai_report
+        
+    Yields:
+        str: Successive chunks of the report text
+        
+    Note:
+        Lets the UI render the report incrementally, e.g. with st.write_stream
+    """
+    response = _get_model().generate_content(_build_report_prompt(data), stream=True)
     
-    return response.text
\ No newline at end of file
+    for chunk in response:
+        yield chunk.text
@@ -1,94 +1,136 @@
 """
-Module for running Lighthouse performance analysis using Brightdata's Scraping Browser.
+Module for running Lighthouse performance analysis using the PageSpeed Insights API.
 """
 
-from selenium.webdriver import Remote, ChromeOptions
-from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.action_chains import ActionChains
-import time
+from concurrent.futures import ThreadPoolExecutor
 import os
+import requests
 from dotenv import load_dotenv
 import streamlit as st
-from typing import Tuple, Optional
+from typing import Optional, Tuple
 
 # Load environment variables
 load_dotenv()
 
-def get_auth() -> str:
+def get_api_key() -> Optional[str]:
     """
-    Retrieve Brightdata authentication credentials from environment variables or Streamlit secrets.
+    Retrieve the optional PageSpeed Insights API key from environment variables or Streamlit secrets.
     
     Returns:
-        str: Brightdata authentication string
-        
+        str: PageSpeed Insights API key, or None if not configured
+    
     Note:
-        Checks both .env file and Streamlit secrets for the auth token
+        The API works without a key but with a much lower request quota
+    """
+    try:
+        return os.getenv("PAGESPEED_API_KEY") or st.secrets.get("PAGESPEED_API_KEY")
+    except FileNotFoundError:
+        return None
+
+# PageSpeed Insights configuration
+PAGESPEED_API_URL = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
+PAGESPEED_API_KEY = get_api_key()
+CATEGORIES = ["performance", "accessibility", "best-practices", "seo"]
+REQUEST_TIMEOUT = 120
+
+# Shared session so repeated analyses reuse open connections to the API
+session = requests.Session()
+
+# Lab metrics included in the text summary
+SUMMARY_AUDITS = [
+    "first-contentful-paint",
+    "largest-contentful-paint",
+    "total-blocking-time",
+    "cumulative-layout-shift",
+    "speed-index",
+]
+
+def _run_single(strategy: str, target_url: str) -> dict:
+    """
+    Run a single PageSpeed Insights analysis for one strategy.
+    
+    Args:
+        strategy (str): Either "mobile" or "desktop"
+        target_url (str): The URL of the webpage to analyze
+    
+    Returns:
+        dict: Parsed PageSpeed Insights response
+    
+    Raises:
+        requests.HTTPError: If the API returns an error status
     """
-    return os.getenv("BRIGHTDATA_AUTH") or st.secrets["BRIGHTDATA_AUTH"]
+    params = {
+        "url": target_url,
+        "strategy": strategy,
+        "category": CATEGORIES,
+    }
+    if PAGESPEED_API_KEY:
+        params["key"] = PAGESPEED_API_KEY
 
-# Brightdata authentication credentials
-AUTH = get_auth()
-SBR_WEBDRIVER = f'https://{AUTH}@brd.superproxy.io:9515'
+    response = session.get(PAGESPEED_API_URL, params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
 
-def get_lighthouse(target_url: str) -> Tuple[Optional[str], Optional[str]]:
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_lighthouse(target_url: str) -> Tuple[Optional[dict], Optional[dict]]:
     """
     Fetch Lighthouse performance metrics for both mobile and desktop versions of a webpage.
     
     Args:
         target_url (str): The URL of the webpage to analyze
-        
+    
     Returns:
         tuple: (mobile_report, desktop_report)
-            - mobile_report (str): Lighthouse performance metrics for mobile
-            - desktop_report (str): Lighthouse performance metrics for desktop
-            
+            - mobile_report (dict): PageSpeed Insights response for mobile
+            - desktop_report (dict): PageSpeed Insights response for desktop
+    
     Note:
-        Uses Brightdata's Scraping Browser to access PageSpeed Insights
-        Handles both mobile and desktop analysis in a single session
+        Uses the PageSpeed Insights REST API, no browser required
+        Runs mobile and desktop analyses concurrently
         Includes performance, accessibility, best practices, and SEO metrics
+        Results are cached for an hour per URL; API errors are not cached
     """
-    # Set up Brightdata Scraping Browser connection
-    sbr_connection = ChromiumRemoteConnection(SBR_WEBDRIVER, 'goog', 'chrome')
-    driver = Remote(sbr_connection, options=ChromeOptions())
-
-    try:
-        # Navigate to PageSpeed Insights
-        encoded_url = f"https://pagespeed.web.dev/analysis?url={target_url}"
-        driver.get(encoded_url)
-        time.sleep(20)
-        # Wait for the report to load
-        WebDriverWait(driver, 60).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "lh-report"))
-        )
-        time.sleep(2)
-        # Get mobile report
-        report_text = driver.find_element(By.TAG_NAME, "body").text
-        # Switch to desktop
-        desktop_tab = WebDriverWait(driver, 20).until(
-            EC.element_to_be_clickable((By.ID, "desktop_tab"))
-        )
-        driver.execute_script("arguments[0].scrollIntoView(true);", desktop_tab)
-        time.sleep(2)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        mobile = executor.submit(_run_single, "mobile", target_url)
+        desktop = executor.submit(_run_single, "desktop", target_url)
+        return mobile.result(), desktop.result()
 
-        # Click desktop ta
-        actions = ActionChains(driver)
-        actions.move_to_element(desktop_tab).click().perform()
-        time.sleep(3)
+def summarize_lighthouse(report: dict) -> str:
+    """
+    Build a plain-text summary of a PageSpeed Insights response for the AI report.
+    
+    Args:
+        report (dict): PageSpeed Insights response returned by get_lighthouse
+    
+    Returns:
+        str: Category scores, lab metrics and failing audit titles, one per line
+    """
+    if not report:
+        return ""
 
-        # Wait for desktop report
-        WebDriverWait(driver, 30).until(
-            lambda driver: driver.find_element(By.CLASS_NAME, "lh-report").text != report_text
-        )
+    result = report.get("lighthouseResult", {})
+    audits = result.get("audits", {})
+    lines = []
 
-        # Get desktop report
-        desktop_report_text = driver.find_element(By.TAG_NAME, "body").text
-        return report_text, desktop_report_text
+    for category in result.get("categories", {}).values():
+        score = category.get("score")
+        value = round(score * 100) if score is not None else "n/a"
+        lines.append(f"{category.get('title')}: {value}")
 
-    finally:
-        # Close WebDriver
-        driver.quit()
+    for audit_id in SUMMARY_AUDITS:
+        audit = audits.get(audit_id)
+        if audit and audit.get("displayValue"):
+            lines.append(f"{audit.get('title')}: {audit['displayValue']}")
 
+    failing = [
+        audit.get("title")
+        for audit in audits.values()
+        if audit.get("score") is not None
+        and audit.get("score") < 0.9
+        and audit.get("scoreDisplayMode") in ("binary", "numeric", "metricSavings")
+    ]
+    if failing:
+        lines.append("Failing audits:")
+        lines.extend(f"- {title}" for title in failing)
 
+    return "\n".join(lines)